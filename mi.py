@@ -1,8 +1,33 @@
 import streamlit as st
-import requests
-import os
+import asyncio
+import functools
+import hashlib
+import httpx
 import hmac
+import itertools
+import json
+import os
 import re
+import tempfile
+import threading
+import time
+
+# How long (in seconds) a Brevo contact lookup is reused before asking again
+CONTACT_CHECK_TTL = 60
+# How long (in seconds) the contact lists are reused before they are fetched again
+CONTACT_LISTS_TTL = 300
+# How long (in seconds) to wait after a failed contact list refresh before trying again
+LIST_REFRESH_BACKOFF = 30
+# Where the list name -> id mapping is saved, so a cold start can render the list selector straight away.
+# One file per API key (named by a fingerprint of it), so another account's lists are never shown
+_LISTS_PATH = os.path.expanduser("~/.brevo_lists-{}.json")
+# Two-digit country codes whose numbers must have exactly this many digits (code included)
+_COUNTRY_LENGTHS = {"27": 11}
+_EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+\Z')
+# Bounded timeouts for every Brevo call, so a stalled socket can't hang the session
+_TIMEOUT = httpx.Timeout(connect=3.05, read=15.0, write=15.0, pool=2.0)
+# How many times an idempotent GET is retried after a read timeout
+_GET_RETRIES = 1
 
 # Set page configuration and hide top-right UI elements
 st.set_page_config(page_title="Brevo PDF Uploader", layout="centered")
@@ -57,84 +82,354 @@ def is_valid_phone_number(phone: str) -> bool:
       
     For other international numbers:
       - Accepts an optional '+' or '00' prefix followed by 8 to 15 digits.
+
+    Any number whose digits start with '27' is treated as South African.
     """
-    # South African phone numbers without prefix (e.g., 27789538632)
-    if phone.startswith("27") and len(phone) == 11:
-        return True
-    # South African phone numbers with '+' or '00' prefix
-    if phone.startswith("+27") and len(phone) == 12:
-        return True
-    if phone.startswith("0027") and len(phone) == 13:
-        return True
-    # General international format: optional '+' or '00' followed by 8 to 15 digits
-    pattern = r'^(?:\+|00)?\d{8,15}$'
-    return re.match(pattern, phone) is not None
+    # Strip the optional '+' or '00' prefix, leaving only the digits
+    if phone.startswith("+"):
+        digits = phone[1:]
+    elif phone.startswith("00"):
+        digits = phone[2:]
+    else:
+        digits = phone
+    if not (digits.isascii() and digits.isdigit()):
+        return False
+    # General international format: 8 to 15 digits
+    length = len(digits)
+    if not 8 <= length <= 15:
+        return False
+    # Countries with a fixed number length (e.g. South Africa: 27 followed by 9 digits)
+    expected = _COUNTRY_LENGTHS.get(digits[:2])
+    return expected is None or length == expected
+
+
+def is_valid_email(email: str) -> bool:
+    """
+    Checks that the email looks complete (something@domain.tld) before it is looked up in Brevo.
+    """
+    return _EMAIL_RE.match(email) is not None
+
+
+def create_session(api_key: str) -> httpx.AsyncClient:
+    """
+    Opens an HTTP/2 client for the Brevo API.
+    Concurrent calls are multiplexed over one kept-alive connection, so repeated calls skip the TCP/TLS handshake.
+    """
+    limits = httpx.Limits(max_connections=20, keepalive_expiry=30)
+    headers = {"accept": "application/json", "api-key": api_key}
+    return httpx.AsyncClient(http2=True, timeout=_TIMEOUT, limits=limits, headers=headers)
+
+
+@st.cache_resource
+def _event_loop():
+    """
+    Event loop running on a daemon thread, shared by every rerun and user of the app.
+    All Brevo calls run on it, so there is one loop for the whole process rather than one per browser session.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+
+@st.cache_resource
+def get_session(api_key: str) -> httpx.AsyncClient:
+    """
+    Brevo client for the shared event loop, shared by every rerun and user of the app
+    so every call keeps reusing the same pooled connections.
+    """
+    return create_session(api_key)
+
+
+def run_in_background(coro):
+    """
+    Schedules a coroutine on the shared event loop and returns a Future for its result.
+    The coroutine must not call Streamlit, since it doesn't run on the script thread.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _event_loop())
+
+
+def run_async(coro):
+    """
+    Runs a coroutine on the shared event loop and waits for its result.
+    Only the network work runs on the loop; Streamlit calls stay on the script thread.
+    """
+    return run_in_background(coro).result()
+
+
+async def fetch_json(session: httpx.AsyncClient, method: str, url: str, **kw):
+    """
+    Sends a request to the Brevo API and returns the decoded JSON body.
+    Raises httpx.HTTPStatusError for non-2xx responses.
+    """
+    response = await session.request(method, url, **kw)
+    response.raise_for_status()
+    return response.json()
+
+
+def with_timeout(func):
+    """
+    Retries a Brevo request after a read timeout, backing off exponentially between attempts.
+    Only use this on idempotent GETs; a POST that timed out may still have been applied.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        for attempt in range(_GET_RETRIES + 1):
+            try:
+                return await func(*args, **kwargs)
+            except httpx.ReadTimeout:
+                if attempt == _GET_RETRIES:
+                    raise
+                await asyncio.sleep(0.5 * 2 ** attempt)
+    return wrapper
+
+
+@with_timeout
+async def get_json(session: httpx.AsyncClient, url: str):
+    """
+    Fetches a Brevo resource and returns the decoded JSON body.
+    """
+    return await fetch_json(session, "GET", url)
+
 
+@with_timeout
+async def get_status(session: httpx.AsyncClient, url: str) -> int:
+    """
+    Fetches a Brevo resource and returns only the HTTP status code.
+    """
+    response = await session.get(url)
+    return response.status_code
 
-def check_existing_contact(identifier: str, identifier_type: str, api_key: str) -> bool:
+
+async def _probe(identifier: str, identifier_type: str, session: httpx.AsyncClient) -> int:
+    """
+    Looks up an identifier in Brevo and returns the HTTP status code.
+    Raises httpx.HTTPError if the request failed.
     """
-    Checks if an identifier (email or phone) is already associated with an existing contact.
-    Returns True if the identifier exists, False otherwise.
+    url = f"https://api.brevo.com/v3/contacts/{identifier}?identifierType={identifier_type}"
+    return await get_status(session, url)
+
+
+def remember_duplicate(identifier: str, identifier_type: str):
+    """
+    Records an identifier that is known to belong to an existing contact,
+    so later checks for it are answered without asking Brevo again.
+    """
+    st.session_state.setdefault("known_dupes", set()).add((identifier, identifier_type))
+
+
+def check_existing_contacts(identifiers, session: httpx.AsyncClient) -> list:
+    """
+    Checks if identifiers (emails or phones) are already associated with existing contacts.
+    Returns a list holding True for each identifier that exists, False otherwise (including when it is empty).
+    The identifiers that need a lookup are looked up concurrently. Conclusive lookups (200 or 404) are memoized
+    in st.session_state for CONTACT_CHECK_TTL seconds, so reruns and the submit step don't repeat
+    them while newly-created contacts are still noticed quickly.
     
     Args:
-        identifier: The email or phone number to check
-        identifier_type: Either 'email_id' for email or 'phone_id' for phone
-        api_key: The Brevo API key
+        identifiers: (identifier, identifier_type) pairs, where identifier_type is either
+            'email_id' for email or 'phone_id' for phone
+        session: The Brevo API session
     """
-    try:
-        url = f"https://api.brevo.com/v3/contacts/{identifier}?identifierType={identifier_type}"
-        headers = {"accept": "application/json", "api-key": api_key}
-        response = requests.get(url, headers=headers)
-        
-        # If we get a 200 response, the identifier exists
-        return response.status_code == 200
-    except requests.exceptions.RequestException:
-        # In case of any error, return False to allow the process to continue
-        return False
+    probes = st.session_state.setdefault("contact_probes", {})
+    known_dupes = st.session_state.setdefault("known_dupes", set())
+    now = time.monotonic()
+    # Identifiers already known to be taken, or looked up recently, never need another round-trip
+    pending = [
+        key for key in dict.fromkeys(identifiers)
+        if key[0] and key not in known_dupes
+        and not (key in probes and now - probes[key][1] < CONTACT_CHECK_TTL)
+    ]
+
+    async def probe_all():
+        return await asyncio.gather(*[_probe(*key, session) for key in pending], return_exceptions=True)
+
+    for key, status in zip(pending, run_async(probe_all()) if pending else []):
+        if isinstance(status, httpx.TimeoutException):
+            st.error(f"Brevo did not respond in time while checking {key[0]}. Please try again.")
+        elif isinstance(status, BaseException) and not isinstance(status, httpx.HTTPError):
+            raise status
+        elif status not in (200, 404):
+            # In case of any error (including 401, 429 and 5xx responses), allow the process to continue.
+            # Failures aren't memoized, so the next rerun tries again.
+            pass
+        else:
+            probes[key] = (status, time.monotonic())
+            # If we get a 200 response, the identifier exists
+            if status == 200:
+                remember_duplicate(*key)
+    return [key in known_dupes for key in identifiers]
 
 
-def get_contact_lists(api_key):
+async def fetch_contact_lists(session):
     """
-    Retrieves ALL contact lists from Brevo using pagination,
-    since the API has a maximum limit of 50 per request.
+    Retrieves ALL contact lists from Brevo.
+    The API has a maximum limit of 50 per request, so the total count is read first
+    and every page is then fetched concurrently.
+    Raises httpx.HTTPError if the count or any page can't be fetched, so a partial result is never returned.
     """
-    all_lists = []
-    offset = 0
     limit = 50  # Brevo's documented maximum
     sort = "desc"
+    url = "https://api.brevo.com/v3/contacts/lists"
+
+    # Probe for the total number of lists
+    data = await get_json(session, f"{url}?limit=1&offset=0&sort={sort}")
+    count = data.get("count", 0)
+
+    # Cap the number of pages in flight to respect Brevo's rate limits
+    semaphore = asyncio.Semaphore(10)
+
+    async def fetch_page(offset):
+        async with semaphore:
+            page = await get_json(session, f"{url}?limit={limit}&offset={offset}&sort={sort}")
+        return page.get("lists", [])
+
+    pages = await asyncio.gather(*[fetch_page(offset) for offset in range(0, count, limit)])
+    return list(itertools.chain.from_iterable(pages))
 
-    while True:
-        # Build the URL with pagination
-        url = f"https://api.brevo.com/v3/contacts/lists?limit={limit}&offset={offset}&sort={sort}"
-        headers = {"accept": "application/json", "api-key": api_key}
 
+def _lists_path(api_key: str) -> str:
+    """
+    Returns where the contact lists of the account behind this API key are saved.
+    """
+    return _LISTS_PATH.format(hashlib.sha256(api_key.encode()).hexdigest()[:16])
+
+
+def save_contact_lists(list_options: dict, api_key: str):
+    """
+    Saves the list name -> id mapping to disk, replacing the previous copy atomically.
+    Every save writes its own temporary file, so concurrent saves can't interleave.
+    """
+    path = _lists_path(api_key)
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
         try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-        except requests.exceptions.RequestException as e:
-            st.error(f"Failed to retrieve contact lists at offset {offset}: {e}")
-            break
+            with os.fdopen(fd, "w") as f:
+                json.dump(list_options, f)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    except OSError:
+        # The saved copy is only a startup shortcut; the app works without it
+        pass
+
+
+def load_saved_contact_lists(api_key: str):
+    """
+    Returns the list name -> id mapping saved by the last fetch and its age in seconds,
+    or (None, None) if there is no readable copy.
+    The mapping is kept in st.session_state keyed by the file and its mtime, so it is only
+    read again after the saved copy has changed.
+    """
+    path = _lists_path(api_key)
+    try:
+        mtime = os.path.getmtime(path)
+        saved = st.session_state.get("saved_lists")
+        if saved is None or saved[:2] != (path, mtime):
+            with open(path) as f:
+                saved = (path, mtime, json.load(f))
+            st.session_state["saved_lists"] = saved
+        return saved[2], time.time() - mtime
+    except (OSError, ValueError):
+        return None, None
+
+
+@st.cache_resource
+def _list_refresh(api_key: str):
+    """
+    State of the background contact list refresh for this API key, shared by every rerun
+    and user of the app, so only one refresh is in flight at a time.
+    """
+    return {"lock": threading.Lock(), "future": None, "failed_at": None}
 
-        data = response.json()
-        lists_chunk = data.get("lists", [])
 
-        if not lists_chunk:
-            # No more lists to fetch
-            break
+def _refresh_error(future):
+    """
+    Returns the exception a finished contact list refresh failed with, or None.
+    """
+    if future is None or not future.done() or future.cancelled():
+        return None
+    return future.exception()
+
 
-        # Add to the master list
-        all_lists.extend(lists_chunk)
+def refresh_contact_lists_in_background(api_key, force=False):
+    """
+    Fetches the contact lists on the background loop, saves them for the next rerun
+    and returns a Future for the name -> id mapping. The saved copy is only replaced by a complete fetch.
+    While a refresh is in flight, or for LIST_REFRESH_BACKOFF seconds after one failed (unless force is set),
+    that refresh's Future is returned instead of asking Brevo again.
+    """
+    session = get_session(api_key)
+    state = _list_refresh(api_key)
+
+    async def refresh():
+        try:
+            lists = await fetch_contact_lists(session)
+        except Exception:
+            state["failed_at"] = time.monotonic()
+            raise
+        list_options = {lst["name"]: lst["id"] for lst in lists}
+        save_contact_lists(list_options, api_key)
+        return list_options
+
+    with state["lock"]:
+        future = state["future"]
+        if future is not None and not future.done():
+            return future
+        if not force and _refresh_error(future) is not None and time.monotonic() - state["failed_at"] < LIST_REFRESH_BACKOFF:
+            return future
+        state["future"] = run_in_background(refresh())
+        return state["future"]
+
+
+def contact_lists_refresh_error(api_key):
+    """
+    Returns the exception the last contact list refresh failed with, or None if it didn't fail.
+    """
+    return _refresh_error(_list_refresh(api_key)["future"])
+
+
+def prefetch_contact_lists(api_key):
+    """
+    Starts refreshing the saved contact lists in the background if they are missing or stale,
+    so they are ready by the time the contact details are entered.
+    Called on every rerun, so a failed refresh is retried once LIST_REFRESH_BACKOFF has passed.
+    """
+    list_options, age = load_saved_contact_lists(api_key)
+    if not list_options or age > CONTACT_LISTS_TTL:
+        refresh_contact_lists_in_background(api_key)
+
+
+@st.cache_data(ttl=CONTACT_LISTS_TTL, show_spinner=False)
+def get_contact_lists(api_key):
+    """
+    Returns the name -> id mapping of ALL contact lists in Brevo, which is all the UI needs.
+    Waits on the background refresh (joining the one prefetch_contact_lists started, if any),
+    so the lists are never fetched twice at once. Cached for 5 minutes so that reruns
+    don't repeat the paginated fetch. Call get_contact_lists.clear() to refetch.
+    Raises httpx.HTTPError if the fetch fails; st.cache_data doesn't cache exceptions,
+    so a later rerun tries again.
+    """
+    return refresh_contact_lists_in_background(api_key).result()
 
-        # Prepare for the next "page"
-        offset += limit
 
-    return all_lists
+async def get_contact_id(email, session: httpx.AsyncClient):
+    """
+    Retrieves the contact ID of a newly created contact based on email.
+    Raises httpx.HTTPError if the lookup fails.
+    """
+    url = f"https://api.brevo.com/v3/contacts/{email}?identifierType=email_id"
+    data = await get_json(session, url)
+    return data.get("id")
 
 
-def create_contact(email, first_name, last_name, phone, list_id, api_key):
+def create_contact(email, first_name, last_name, phone, list_id, session):
     """
     Creates a new contact in Brevo and assigns it to a selected list.
     Now updated to pass phone number in both 'SMS' and 'WHATSAPP'.
+    Returns (created, contact_id). The ID is read from the creation response, or looked up
+    by email if the response doesn't carry it; it is None if the contact wasn't created
+    or its ID couldn't be retrieved.
     """
     try:
         url = "https://api.brevo.com/v3/contacts"
@@ -148,64 +443,81 @@ def create_contact(email, first_name, last_name, phone, list_id, api_key):
             },
             "listIds": [list_id]
         }
-        headers = {
-            "accept": "application/json",
-            "content-type": "application/json",
-            "api-key": api_key
-        }
-        response = requests.post(url, json=payload, headers=headers)
-        response.raise_for_status()
-        return True
-    except requests.exceptions.HTTPError as http_err:
-        try:
-            error_data = http_err.response.json()
-            error_message = error_data.get("message", "")
-            # Check for duplicate contact error or phone number issues
-            if "already exists" in error_message.lower():
-                st.error("A contact with this email or phone number already exists. Please check your details and try again.")
-            elif "phone" in error_message.lower() or "sms" in error_message.lower():
-                st.error("Invalid phone number format. For South Africa, please ensure the number is 11 digits and starts with 27 (or use +27/0027 prefixes), or follow the appropriate international format.")
-            else:
-                st.error(f"Failed to add contact: {error_message}")
-        except ValueError:
-            st.error(f"Failed to add contact: {http_err}")
-        return False
+        response = run_async(session.post(url, json=payload))
     except Exception as e:
         st.error(f"Failed to add contact: {e}")
-        return False
+        return False, None
+    if response.is_success:
+        try:
+            contact_id = response.json().get("id")
+        except (ValueError, AttributeError):
+            contact_id = None
+        if contact_id is None:
+            try:
+                contact_id = run_async(get_contact_id(email, session))
+            except httpx.HTTPError as e:
+                st.error(f"Contact was added, but its ID could not be retrieved: {e}")
+        return True, contact_id
+    try:
+        error_data = response.json()
+        error_message = error_data.get("message", "")
+        # Check for duplicate contact error or phone number issues
+        if "already exists" in error_message.lower():
+            # Remember which identifier clashed so a retry is rejected instantly
+            if any(word in error_message.lower() for word in ("phone", "sms", "whatsapp")):
+                remember_duplicate(phone, 'phone_id')
+            else:
+                remember_duplicate(email, 'email_id')
+            st.error("A contact with this email or phone number already exists. Please check your details and try again.")
+        elif "phone" in error_message.lower() or "sms" in error_message.lower():
+            st.error("Invalid phone number format. For South Africa, please ensure the number is 11 digits and starts with 27 (or use +27/0027 prefixes), or follow the appropriate international format.")
+        else:
+            st.error(f"Failed to add contact: {error_message}")
+    except (ValueError, AttributeError):
+        st.error(f"Failed to add contact: {response.status_code} {response.reason_phrase}")
+    return False, None
 
 
-def get_contact_id(email, api_key):
+async def upload_file(contact_id, uploaded_file, session):
     """
-    Retrieves the contact ID of a newly created contact based on email.
+    Uploads a PDF file to the specified contact in Brevo.
+    The Streamlit upload is streamed straight into the multipart body, without a temporary file,
+    so there is no file handle to close; Streamlit owns the buffer.
+    Raises httpx.HTTPError if the upload fails.
     """
-    try:
-        url = f"https://api.brevo.com/v3/contacts/{email}"
-        headers = {"accept": "application/json", "api-key": api_key}
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        return response.json().get("id")
-    except requests.exceptions.RequestException as e:
-        st.error(f"Failed to retrieve contact ID: {e}")
-        return None
+    url = "https://api.brevo.com/v3/crm/files"
+    files = {"file": (uploaded_file.name, uploaded_file, "application/pdf")}
+    payload = {"contactId": contact_id}
+    data = await fetch_json(session, "POST", url, data=payload, files=files)
+    return f"✅ File uploaded successfully! File ID: {data.get('id')}"
 
 
-def upload_file(contact_id, file_path, api_key):
+def upload_file_in_background(contact_id, uploaded_file, api_key):
     """
-    Uploads a PDF file to the specified contact in Brevo.
+    Starts uploading the PDF on the background loop and returns a Future for the upload_file result.
     """
-    try:
-        url = "https://api.brevo.com/v3/crm/files"
-        files = {"file": (os.path.basename(file_path), open(file_path, "rb"), "application/pdf")}
-        payload = {"contactId": contact_id}
-        headers = {"accept": "application/json", "api-key": api_key}
-        response = requests.post(url, data=payload, files=files, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        return f"✅ File uploaded successfully! File ID: {data.get('id')}"
-    except requests.exceptions.RequestException as e:
-        st.error(f"❌ File upload failed: {e}")
-        return None
+    return run_in_background(upload_file(contact_id, uploaded_file, get_session(api_key)))
+
+
+@st.fragment(run_every=1)
+def show_upload_status():
+    """
+    Shows the background PDF uploads that are still running, checking on them every second.
+    Once any of them finishes, its outcome is stored for the next full rerun to display.
+    """
+    uploads = st.session_state["pdf_uploads"]
+    results = st.session_state.setdefault("pdf_upload_results", [])
+    for contact_id, (future, file_name) in list(uploads.items()):
+        if not future.done():
+            st.status(f"Uploading PDF '{file_name}'…", state="running")
+            continue
+        del uploads[contact_id]
+        try:
+            results.append((True, future.result()))
+        except Exception as e:
+            results.append((False, f"❌ File upload of '{file_name}' failed: {e}"))
+    if results:
+        st.rerun()
 
 
 def main():
@@ -217,30 +529,75 @@ def main():
     # Retrieve API key from Streamlit secrets
     api_key = st.secrets["BREVO_API_KEY"]
 
+    # Start loading the contact lists while the user is still typing
+    prefetch_contact_lists(api_key)
+
     # User input fields
     first_name = st.sidebar.text_input("Enter First Name")
     last_name = st.sidebar.text_input("Enter Last Name")
     email = st.sidebar.text_input("Enter Contact Email")
     phone = st.sidebar.text_input("Enter Contact Phone Number")
 
+    # Let the operator pick up newly-created lists without waiting for the cache to expire
+    if st.sidebar.button("Refresh lists"):
+        get_contact_lists.clear()
+        with st.spinner("Refreshing contact lists…"):
+            try:
+                refresh_contact_lists_in_background(api_key, force=True).result()
+            except httpx.HTTPError as e:
+                st.error(f"Failed to refresh contact lists: {e}")
+
+    # One pooled Brevo client is shared by every rerun and user of the app
+    session = get_session(api_key)
+
+    # The contact lists are only needed once the contact details are filled in.
+    # Use the saved copy when there is one (prefetch_contact_lists keeps it fresh);
+    # otherwise wait for the lists to be fetched (cached across reruns)
+    list_options = {}
+    if first_name and last_name and email:
+        list_options, age = load_saved_contact_lists(api_key)
+        if list_options:
+            refresh_error = contact_lists_refresh_error(api_key)
+            if refresh_error is not None and age > CONTACT_LISTS_TTL:
+                st.sidebar.warning(f"Showing saved contact lists; refreshing them failed: {refresh_error}")
+        else:
+            try:
+                list_options = get_contact_lists(api_key)
+            except httpx.HTTPError as e:
+                st.error(f"Failed to retrieve contact lists: {e}")
+                list_options = {}
+
+    # Report on the PDF uploads started by earlier submits (before the form, which may return early)
+    for uploaded, message in st.session_state.pop("pdf_upload_results", []):
+        if uploaded:
+            st.success(message)
+        else:
+            st.error(message)
+    upload_status_shown = bool(st.session_state.get("pdf_uploads"))
+    if upload_status_shown:
+        show_upload_status()
+
+    # Look up the email and phone concurrently; skip identifiers that are still being typed
+    phone_valid = is_valid_phone_number(phone)
+    email_exists, phone_exists = check_existing_contacts([
+        (email if is_valid_email(email) else "", 'email_id'),
+        (phone if phone_valid else "", 'phone_id'),
+    ], session)
+
     # Validate email if provided
-    if email:
-        if check_existing_contact(email, 'email_id', api_key):
-            st.sidebar.error("This email address is already associated with an existing contact. Please use a different email.")
+    if email_exists:
+        st.sidebar.error("This email address is already associated with an existing contact. Please use a different email.")
 
     # Validate phone number format and existence if provided
     if phone:
-        if not is_valid_phone_number(phone):
+        if not phone_valid:
             st.sidebar.error("Invalid phone number format. For South Africa, please ensure the number is 11 digits and starts with 27 (or use +27/0027 prefixes). For other countries, please follow the appropriate format.")
-        elif check_existing_contact(phone, 'phone_id', api_key):
+        elif phone_exists:
             st.sidebar.error("This phone number is already associated with an existing contact. Please use a different number.")
 
-    # Fetch contact lists for selection
-    lists = get_contact_lists(api_key)
-    if not lists:
+    if not list_options:
         return
 
-    list_options = {lst["name"]: lst["id"] for lst in lists}
     selected_list = st.sidebar.selectbox("Select List to Add Contact", list_options.keys())
 
     # File uploader for PDF selection (optional now)
@@ -254,46 +611,47 @@ def main():
             return
 
         # Final validations before API call
-        if not is_valid_phone_number(phone):
+        if not phone_valid:
             st.error("The phone number you entered is not in an accepted format. Please correct it.")
             return
-            
-        # Check if email or phone already exist
-        if check_existing_contact(email, 'email_id', api_key):
+
+        # Check if email or phone already exist (looked up above)
+        if email_exists:
             st.error("This email address is already associated with an existing contact. Please use a different email.")
             return
-            
-        if check_existing_contact(phone, 'phone_id', api_key):
+
+        if phone_exists:
             st.error("This phone number is already associated with an existing contact. Please use a different number.")
             return
 
         list_id = list_options[selected_list]
-        if create_contact(email, first_name, last_name, phone, list_id, api_key):
-            contact_id = get_contact_id(email, api_key)
-            if contact_id:
-                # If a file is uploaded, proceed with upload
-                if uploaded_file and file_name:
-                    file_path = file_name  # Use the original file name as temporary path
-                    with open(file_path, "wb") as f:
-                        f.write(uploaded_file.getbuffer())
-
-                    result = upload_file(contact_id, file_path, api_key)
-                    os.remove(file_path)
-                    if result:
-                        st.success(
-                            f"✅ Contact {first_name} {last_name} added to list '{selected_list}' "
-                            f"and PDF '{file_name}' uploaded successfully."
-                        )
-                    else:
-                        st.error("Failed to upload the PDF file.")
-                else:
-                    st.success(
-                        f"✅ Contact {first_name} {last_name} added to list '{selected_list}' "
-                        "There was no PDF upload."
-                    )
-                st.info("To add another contact (and optionally upload a file), repeat the process above.")
+        created, contact_id = create_contact(email, first_name, last_name, phone, list_id, session)
+        if created:
+            # Both identifiers are now taken; remember that for later submissions
+            remember_duplicate(email, 'email_id')
+            remember_duplicate(phone, 'phone_id')
+            # If a file is uploaded, proceed with upload
+            if uploaded_file and file_name and not contact_id:
+                st.success(f"✅ Contact {first_name} {last_name} added to list '{selected_list}'.")
+                st.error(f"❌ PDF '{file_name}' was not uploaded because the new contact's ID is unknown.")
+            elif uploaded_file and file_name:
+                # Upload in the background so the page doesn't wait on a large PDF
+                future = upload_file_in_background(contact_id, uploaded_file, api_key)
+                st.session_state.setdefault("pdf_uploads", {})[contact_id] = (future, file_name)
+                # A status poller already running picks the new upload up on its next check;
+                # otherwise start one now, or the outcome would wait for the next widget change
+                if not upload_status_shown:
+                    show_upload_status()
+                st.success(
+                    f"✅ Contact {first_name} {last_name} added to list '{selected_list}'. "
+                    f"Uploading PDF '{file_name}'…"
+                )
             else:
-                st.error("Failed to retrieve contact ID after creation.")
+                st.success(
+                    f"✅ Contact {first_name} {last_name} added to list '{selected_list}' "
+                    "There was no PDF upload."
+                )
+            st.info("To add another contact (and optionally upload a file), repeat the process above.")
         else:
             st.error("Failed to add contact. Please check your details and try again.")
 